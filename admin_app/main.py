@@ -166,47 +166,79 @@ def page_blocks():
                 """), dict(by=st.session_state.user, id=int(bid)))
             st.success("Desbloqueado (DB). Se houver chave no Redis, expirará automaticamente pelo TTL.")
 
+# Relatórios: leem só os rollups (rate_limit_event_rollup), com cache entre reruns do Streamlit
+REPORT_CACHE_TTL_SEC = int(os.getenv("REPORT_CACHE_TTL_SEC", "60"))
+
+@st.cache_data(ttl=REPORT_CACHE_TTL_SEC, show_spinner=False)
+def load_rollup_totals(since: datetime) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql(text("""
+            SELECT endpoint, decision, SUM(events) AS count
+            FROM dbo.rate_limit_event_rollup
+            WHERE granularity = 'hour' AND bucket_ts >= :since
+            GROUP BY endpoint, decision
+        """), conn, params={"since": since})
+
+@st.cache_data(ttl=REPORT_CACHE_TTL_SEC, show_spinner=False)
+def load_rollup_daily(since: datetime) -> pd.DataFrame:
+    with engine.connect() as conn:
+        return pd.read_sql(text("""
+            SELECT bucket_ts AS date, decision, SUM(events) AS count
+            FROM dbo.rate_limit_event_rollup
+            WHERE granularity = 'day' AND bucket_ts >= :since
+            GROUP BY bucket_ts, decision
+            ORDER BY bucket_ts
+        """), conn, params={"since": since})
+
+@st.cache_data(ttl=REPORT_CACHE_TTL_SEC, show_spinner=False)
+def load_rollup_updated_at():
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT updated_at FROM dbo.rate_limit_rollup_state WHERE name = 'rate_limit_event'")).fetchone()
+    return row[0] if row else None
+
+@st.cache_data(ttl=REPORT_CACHE_TTL_SEC, show_spinner=False)
+def load_events_detail(since: datetime, user: str, endpoint: str) -> pd.DataFrame:
+    q = "SELECT TOP 1000 * FROM dbo.rate_limit_event WHERE ts >= :since"
+    params = {"since": since}
+    if user:
+        q += " AND username = :u"
+        params["u"] = user
+    if endpoint:
+        q += " AND endpoint = :e"
+        params["e"] = endpoint
+    q += " ORDER BY ts DESC"
+    with engine.connect() as conn:
+        return pd.read_sql(text(q), conn, params=params)
+
 def page_reports():
     st.header("📈 Relatórios & Indicadores")
     days = st.slider("Período (dias)", 1, 30, 7)
-    since = datetime.utcnow() - timedelta(days=days)
-    with engine.connect() as conn:
-        df = pd.read_sql(text("""
-            SELECT ts, username, role, endpoint, decision, calls
-            FROM dbo.rate_limit_event
-            WHERE ts >= :since
-            ORDER BY ts DESC
-        """), conn, params={"since": since})
+    # Truncado na hora: mesma chave de cache entre reruns e alinhado aos buckets do rollup
+    since = (datetime.utcnow() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+    df = load_rollup_totals(since)
     if df.empty:
         st.info("Sem eventos no período.")
         return
+    updated_at = load_rollup_updated_at()
+    if updated_at:
+        st.caption(f"Contadores agregados até {updated_at:%Y-%m-%d %H:%M:%S} UTC")
     c1, c2, c3 = st.columns(3)
-    c1.metric("Total eventos", len(df))
-    c2.metric("Blocks", (df["decision"] == "block").sum())
-    c3.metric("Allow", (df["decision"] == "allow").sum())
+    c1.metric("Total eventos", int(df["count"].sum()))
+    c2.metric("Blocks", int(df.loc[df["decision"] == "block", "count"].sum()))
+    c3.metric("Allow", int(df.loc[df["decision"] == "allow", "count"].sum()))
 
-    fig = px.histogram(df, x="endpoint", color="decision", barmode="group", title="Eventos por endpoint")
+    fig = px.bar(df, x="endpoint", y="count", color="decision", barmode="group", title="Eventos por endpoint")
     st.plotly_chart(fig, use_container_width=True)
 
-    df["date"] = pd.to_datetime(df["ts"]).dt.date
-    agg = df.groupby(["date", "decision"]).size().reset_index(name="count")
+    agg = load_rollup_daily(since.replace(hour=0))
+    agg["date"] = pd.to_datetime(agg["date"]).dt.date
     fig2 = px.line(agg, x="date", y="count", color="decision", title="Eventos por dia")
     st.plotly_chart(fig2, use_container_width=True)
 
     with st.expander("🔎 Filtro detalhado"):
         user = st.text_input("username (opcional)")
         endpoint = st.text_input("endpoint (opcional)")
-        q = "SELECT TOP 1000 * FROM dbo.rate_limit_event WHERE ts >= :since"
-        params = {"since": since}
-        if user:
-            q += " AND username = :u"
-            params["u"] = user
-        if endpoint:
-            q += " AND endpoint = :e"
-            params["e"] = endpoint
-        q += " ORDER BY ts DESC"
-        with engine.connect() as conn:
-            df2 = pd.read_sql(text(q), conn, params=params)
+        df2 = load_events_detail(since, user, endpoint)
         st.dataframe(df2, use_container_width=True, height=300)
 
 def page_utils():
@@ -0,0 +1,103 @@
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+
+# Agregações permitidas em /aggregate/{table}
+AGG_FUNCS = {"sum", "count", "min", "max"}
+NUMERIC_TYPES = {"int", "bigint", "smallint", "tinyint", "decimal", "numeric", "float", "real", "money", "smallmoney"}
+# Tipos que não podem ir para GROUP BY/MIN/MAX
+BLOB_TYPES = {"text", "ntext", "image", "xml", "varbinary", "binary", "geography", "geometry"}
+
+AGGREGATE_MAX_GROUPS = int(os.getenv("AGGREGATE_MAX_GROUPS", "10000"))
+AGGREGATE_MAX_DIMENSIONS = int(os.getenv("AGGREGATE_MAX_DIMENSIONS", "4"))
+_COLUMNS_TTL_SEC = 600
+
+# Cache de metadados das views: {view: (ts, {COLUNA: tipo})}
+_COLUMNS_CACHE: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+def table_columns(engine, view: str) -> Dict[str, str]:
+    """
+    Colunas da view (INFORMATION_SCHEMA), usadas como whitelist de dimensões/medidas.
+    AGGREGATE_COLUMNS_<VIEW>=COL1,COL2 restringe ainda mais o conjunto exposto.
+    """
+    cached = _COLUMNS_CACHE.get(view)
+    if cached and time.time() - cached[0] < _COLUMNS_TTL_SEC:
+        return cached[1]
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = :t"),
+            {"t": view},
+        ).fetchall()
+    columns = {r[0].upper(): r[1].lower() for r in rows}
+    allowed = os.getenv(f"AGGREGATE_COLUMNS_{view}")
+    if allowed:
+        keep = {c.strip().upper() for c in allowed.split(",") if c.strip()}
+        columns = {c: t for c, t in columns.items() if c in keep}
+    _COLUMNS_CACHE[view] = (time.time(), columns)
+    return columns
+
+def parse_group_by(group_by: Optional[str]) -> List[str]:
+    return [c.strip().upper() for c in (group_by or "").split(",") if c.strip()]
+
+def parse_measures(measures: Optional[str]) -> List[Tuple[str, str]]:
+    """'sum:VALOR,count:*' -> [('sum', 'VALOR'), ('count', '*')]. Padrão: count:*."""
+    parsed = []
+    for item in (measures or "count:*").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        func, _, col = item.partition(":")
+        parsed.append((func.strip().lower(), (col.strip() or "*").upper()))
+    return parsed
+
+def measure_alias(func: str, col: str) -> str:
+    return func if col == "*" else f"{func}_{col}"
+
+def build_aggregate_query(view: str, columns: Dict[str, str], group_by: List[str],
+                          measures: List[Tuple[str, str]], status_filter: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    Compila um GROUP BY parametrizado. Identificadores só entram no SQL se estiverem
+    na whitelist da view; valores sempre via bind params. ValueError se inválido.
+    """
+    if len(group_by) > AGGREGATE_MAX_DIMENSIONS:
+        raise ValueError(f"Máximo de {AGGREGATE_MAX_DIMENSIONS} dimensões em group_by")
+    if not measures:
+        raise ValueError("Informe ao menos uma medida")
+    for col in group_by:
+        if col not in columns or columns[col] in BLOB_TYPES:
+            raise ValueError(f"Dimensão não permitida: {col}")
+    if len(set(group_by)) != len(group_by):
+        raise ValueError("Dimensão repetida em group_by")
+
+    select_parts = [f"[{col}]" for col in group_by]
+    aliases = set(group_by)
+    for func, col in measures:
+        if func not in AGG_FUNCS:
+            raise ValueError(f"Agregação não permitida: {func}")
+        if col == "*":
+            if func != "count":
+                raise ValueError(f"{func} exige uma coluna")
+            expr = "COUNT_BIG(*)"
+        else:
+            if col not in columns or columns[col] in BLOB_TYPES:
+                raise ValueError(f"Medida não permitida: {col}")
+            if func == "sum" and columns[col] not in NUMERIC_TYPES:
+                raise ValueError(f"sum exige coluna numérica: {col}")
+            expr = f"COUNT_BIG([{col}])" if func == "count" else f"{func.upper()}([{col}])"
+        alias = measure_alias(func, col)
+        if alias in aliases:
+            raise ValueError(f"Medida repetida: {func}:{col}")
+        aliases.add(alias)
+        select_parts.append(f"{expr} AS [{alias}]")
+
+    # Uma linha a mais que o limite: quem executa sabe que houve corte (truncated)
+    params = {"max_groups": AGGREGATE_MAX_GROUPS + 1}
+    sql = f"SELECT TOP (:max_groups) {', '.join(select_parts)} FROM {view}"
+    if status_filter:
+        sql += " WHERE STATUS = :status_filter"
+        params["status_filter"] = status_filter
+    if group_by:
+        dims = ", ".join(f"[{col}]" for col in group_by)
+        sql += f" GROUP BY {dims} ORDER BY {dims}"
+    return sql, params
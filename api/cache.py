@@ -0,0 +1,75 @@
+import os
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cliente binário (sem decode_responses): os payloads ficam gravados já comprimidos.
+# Criado no primeiro uso, não no import.
+_cache_client = None
+
+def get_client():
+    global _cache_client
+    if _cache_client is None:
+        from redis import Redis
+        _cache_client = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=False)
+    return _cache_client
+
+RESPONSE_CACHE_TTL_SEC = int(os.getenv("RESPONSE_CACHE_TTL_SEC", "60"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+def cache_enabled() -> bool:
+    return RESPONSE_CACHE_TTL_SEC > 0
+
+def make_key(table_name: str, **params) -> str:
+    """Chave estável por tabela + parâmetros da consulta (sem o encoding)."""
+    raw = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:16]
+    return f"rc:{table_name}:{digest}"
+
+def get_payload(key: str, encoding: Optional[str]) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Lê o payload já comprimido no encoding pedido; se não houver, tenta a versão
+    identity (payloads abaixo de COMPRESSION_MIN_BYTES são gravados sem compressão).
+    Retorna (body, encoding do body). Falha de Redis = miss.
+    """
+    if not cache_enabled():
+        return None, None
+    try:
+        if encoding is None:
+            return get_client().get(f"{key}:identity"), None
+        compressed, identity = get_client().mget(f"{key}:{encoding}", f"{key}:identity")
+    except Exception as e:
+        logger.warning(f"Cache indisponível (get): {e}")
+        return None, None
+    if compressed is not None:
+        return compressed, encoding
+    return identity, None
+
+def set_payload(key: str, encoding: Optional[str], body: bytes) -> None:
+    if not cache_enabled() or len(body) > RESPONSE_CACHE_MAX_BYTES:
+        return
+    try:
+        get_client().setex(f"{key}:{encoding or 'identity'}", RESPONSE_CACHE_TTL_SEC, body)
+    except Exception as e:
+        logger.warning(f"Cache indisponível (set): {e}")
+
+def get_etag(key: str) -> Optional[str]:
+    """ETag (modo content) do último payload gravado para a chave."""
+    if not cache_enabled():
+        return None
+    try:
+        value = get_client().get(f"{key}:etag")
+        return value.decode() if value is not None else None
+    except Exception as e:
+        logger.warning(f"Cache indisponível (get): {e}")
+        return None
+
+def set_etag(key: str, etag: str) -> None:
+    if not cache_enabled():
+        return
+    try:
+        get_client().setex(f"{key}:etag", RESPONSE_CACHE_TTL_SEC, etag.encode())
+    except Exception as e:
+        logger.warning(f"Cache indisponível (set): {e}")
@@ -0,0 +1,174 @@
+import os
+import gzip
+import zlib
+import json
+from datetime import date, time
+from decimal import Decimal
+from typing import Optional, Iterable, Iterator, List
+
+# Codecs opcionais: brotli e zstandard. Sem eles, cai para gzip (stdlib).
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Níveis (ENV) — defaults escolhidos pelo bench/compression_bench.py
+GZIP_LEVEL     = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+ZSTD_LEVEL     = int(os.getenv("ZSTD_LEVEL", "3"))
+COMPRESSION_ENABLED   = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+STREAM_CHUNK_ROWS     = int(os.getenv("STREAM_CHUNK_ROWS", "500"))
+
+def available_encodings() -> List[str]:
+    """Encodings suportados, na ordem de preferência do servidor."""
+    encs = []
+    if zstandard is not None:
+        encs.append("zstd")
+    if brotli is not None:
+        encs.append("br")
+    encs.append("gzip")
+    return encs
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Escolhe o Content-Encoding a partir do header Accept-Encoding.
+    Respeita q-values (q=0 exclui); empate resolvido por zstd > br > gzip.
+    Retorna None para resposta sem compressão (identity).
+    """
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for enc in available_encodings():
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+def compress(data: bytes, encoding: Optional[str], level: Optional[int] = None) -> bytes:
+    """Compressão one-shot (usada para payloads em cache)."""
+    if encoding is None:
+        return data
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL if level is None else level).compress(data)
+    raise ValueError(f"Encoding não suportado: {encoding}")
+
+class StreamingCompressor:
+    """
+    Compressor incremental para respostas chunked.
+    write(chunk) devolve os bytes comprimidos disponíveis (pode ser b"");
+    finish() fecha o stream e devolve o restante.
+    """
+
+    def __init__(self, encoding: Optional[str], level: Optional[int] = None):
+        self.encoding = encoding
+        if encoding is None:
+            self._obj = None
+        elif encoding == "gzip":
+            # wbits=31 -> container gzip (header + trailer CRC32)
+            self._obj = zlib.compressobj(GZIP_LEVEL if level is None else level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY if level is None else level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL if level is None else level).compressobj()
+        else:
+            raise ValueError(f"Encoding não suportado: {encoding}")
+
+    def write(self, chunk: bytes) -> bytes:
+        if self._obj is None:
+            return chunk
+        if self.encoding == "br":
+            return self._obj.process(chunk)
+        return self._obj.compress(chunk)
+
+    def flush(self) -> bytes:
+        """Esvazia o buffer sem fechar o stream (o cliente já consegue descomprimir o que chegou)."""
+        if self._obj is None:
+            return b""
+        if self.encoding == "gzip":
+            return self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.flush()
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self._obj is None:
+            return b""
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+def _json_default(value):
+    """Tipos que o json não conhece (date/time/UUID/Decimal do pyodbc), como o jsonable_encoder fazia."""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+def iter_json_payload(payload: dict, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serializa o payload de execute_table_query em pedaços, sem montar a string inteira.
+    O campo "data" é emitido em lotes de chunk_rows registros.
+    """
+    head = {k: v for k, v in payload.items() if k != "data"}
+    if "data" not in payload:
+        yield dumps(head)
+        return
+    records = payload["data"]
+    prefix = dumps(head)[:-1]
+    yield prefix + (b',"data":[' if head else b'"data":[')
+    for i in range(0, len(records), chunk_rows):
+        batch = b",".join(dumps(r) for r in records[i:i + chunk_rows])
+        yield batch if i == 0 else b"," + batch
+    yield b"]}"
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str], sink: Optional[list] = None, flush: bool = False) -> Iterator[bytes]:
+    """
+    Aplica StreamingCompressor sobre um iterável de bytes.
+    Se `sink` for informado, os bytes comprimidos também são acumulados nele (para gravar em cache).
+    flush=True entrega cada chunk assim que chega (NDJSON), ao custo de alguma taxa de compressão.
+    """
+    comp = StreamingCompressor(encoding)
+    for chunk in chunks:
+        out = comp.write(chunk)
+        if flush:
+            out += comp.flush()
+        if out:
+            if sink is not None:
+                sink.append(out)
+            yield out
+    tail = comp.finish()
+    if tail:
+        if sink is not None:
+            sink.append(tail)
+        yield tail
@@ -1,4 +1,8 @@
 import os
+import time
+import hashlib
+import logging
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from .models import Base
@@ -6,10 +10,7 @@ from .models import Base
 from core.env import load_project_env
 load_project_env()
 
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .models import Base
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 POLICY_DATABASE_URL = os.getenv("POLICY_DATABASE_URL")
@@ -19,38 +20,161 @@ if not DATABASE_URL:
 if not POLICY_DATABASE_URL:
     raise RuntimeError("POLICY_DATABASE_URL não definido. Verifique o .env na raiz.")
 
-data_engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    # dica: prefira definir Login Timeout no connection string ODBC
-)
-policy_engine = create_engine(
-    POLICY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
+DB_CONNECTION_TIMEOUT = int(os.getenv("DB_CONNECTION_TIMEOUT", "300"))
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-POLICY_DATABASE_URL = os.getenv("POLICY_DATABASE_URL")
+def _pool_env(prefix: str, name: str, default: str) -> str:
+    """Config de pool por engine (DATA_DB_POOL_SIZE) com fallback global (DB_POOL_SIZE)."""
+    return os.getenv(f"{prefix}_{name}", os.getenv(name, default))
+
+def _pool_config(prefix: str) -> dict:
+    return {
+        "pool_size":     int(_pool_env(prefix, "DB_POOL_SIZE", "5")),
+        "max_overflow":  int(_pool_env(prefix, "DB_MAX_OVERFLOW", "10")),
+        "pool_timeout":  int(_pool_env(prefix, "POOL_TIMEOUT", "300")),
+        "pool_recycle":  int(_pool_env(prefix, "DB_POOL_RECYCLE", "3600")),
+        # pre-ping custa um round trip por checkout; a validação periódica (abaixo) substitui
+        "pool_pre_ping": _pool_env(prefix, "DB_POOL_PRE_PING", "false").lower() == "true",
+    }
+
+def _warm_count(prefix: str) -> int:
+    return int(_pool_env(prefix, "DB_POOL_WARM", "2"))
+
+POOL_VALIDATE_INTERVAL_SEC = int(os.getenv("DB_POOL_VALIDATE_INTERVAL_SEC", "60"))
+
+# Configuração efetiva de cada pool (reportada em /health e usada para dimensionar o batch)
+POOL_CONFIG = {"data_engine": _pool_config("DATA"), "policy_engine": _pool_config("POLICY")}
 
 # Engine de dados (Protheus_Producao)
 data_engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args={"autocommit": True, "timeout": int(os.getenv("DB_CONNECTION_TIMEOUT", "300"))}
+    **POOL_CONFIG["data_engine"],
+    connect_args={"autocommit": True, "timeout": DB_CONNECTION_TIMEOUT}
+    # dica: prefira definir Login Timeout no connection string ODBC
 )
 
 # Engine de políticas/logs (BISOBEL)
 policy_engine = create_engine(
     POLICY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args={"autocommit": True, "timeout": int(os.getenv("DB_CONNECTION_TIMEOUT", "300"))}
+    **POOL_CONFIG["policy_engine"],
+    connect_args={"autocommit": True, "timeout": DB_CONNECTION_TIMEOUT}
 )
 
 PolicySessionLocal = sessionmaker(bind=policy_engine, autoflush=False, autocommit=False)
 
-def init_policy_schema():
+ENGINES = {"data_engine": (data_engine, "DATA"), "policy_engine": (policy_engine, "POLICY")}
+
+# Contadores por engine (expostos em /health)
+_POOL_COUNTERS = {name: {"validations": 0, "invalidated": 0, "last_validation": None, "warmed": 0} for name in ENGINES}
+_validator_stop = threading.Event()
+
+def policy_schema_version() -> str:
+    """Hash da definição dos modelos (tabelas, colunas, tipos, índices)."""
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f"{c.name}:{c.type}:{c.nullable}:{c.primary_key}" for c in table.columns)
+        parts.extend(sorted(f"ix:{ix.name}:{ix.unique}" for ix in table.indexes))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+def _schema_version_key() -> str:
+    # Um registro por banco de políticas (URL sem expor credenciais)
+    return f"schema:policy:{hashlib.sha1(POLICY_DATABASE_URL.encode()).hexdigest()[:12]}"
+
+def init_policy_schema(force: bool = False) -> bool:
+    """
+    create_all() no BISOBEL, pulado quando a versão dos modelos já foi aplicada
+    (registrada no Redis). Retorna True se o DDL rodou.
+    """
+    from .cache import get_client
+
+    version = policy_schema_version()
+    if not force:
+        try:
+            if get_client().get(_schema_version_key()) == version.encode():
+                logger.info(f"Schema de políticas na versão {version}; create_all() pulado.")
+                return False
+        except Exception as e:
+            logger.warning(f"Cache indisponível (schema version): {e}")
+
     Base.metadata.create_all(policy_engine)
+    try:
+        get_client().set(_schema_version_key(), version)
+    except Exception as e:
+        logger.warning(f"Cache indisponível (schema version): {e}")
+    return True
+
+def warm_pool(engine, count: int) -> int:
+    """Abre `count` conexões simultâneas e devolve ao pool. Retorna quantas abriram."""
+    conns = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conn.exec_driver_sql("SELECT 1")
+            conns.append(conn)
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+def warm_pools():
+    """Pré-aquece os pools no startup; falha de um engine não impede o outro."""
+    for name, (engine, prefix) in ENGINES.items():
+        try:
+            started = time.perf_counter()
+            n = warm_pool(engine, min(_warm_count(prefix), POOL_CONFIG[name]["pool_size"]))
+            _POOL_COUNTERS[name]["warmed"] = n
+            logger.info(f"Pool {name}: {n} conexões pré-aquecidas em {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"Falha ao pré-aquecer pool {name}: {e}")
+
+def validate_pool(engine, name: str):
+    """
+    Valida as conexões ociosas (SELECT 1) e invalida as quebradas, fora do caminho
+    das requisições. Uma conexão por vez, devolvida logo em seguida: as demais seguem
+    livres para as requisições. O QueuePool é FIFO, então checkedin() checkouts
+    passam por cada conexão ociosa do início da rodada.
+    """
+    counters = _POOL_COUNTERS[name]
+    for _ in range(engine.pool.checkedin()):
+        with engine.connect() as conn:
+            try:
+                conn.exec_driver_sql("SELECT 1")
+            except Exception as e:
+                logger.warning(f"Pool {name}: conexão inválida descartada ({e})")
+                conn.invalidate()
+                counters["invalidated"] += 1
+    counters["validations"] += 1
+    counters["last_validation"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _validator_loop():
+    while not _validator_stop.wait(POOL_VALIDATE_INTERVAL_SEC):
+        for name, (engine, _) in ENGINES.items():
+            try:
+                validate_pool(engine, name)
+            except Exception as e:
+                logger.error(f"Falha na validação do pool {name}: {e}")
+
+def start_pool_validator():
+    if POOL_VALIDATE_INTERVAL_SEC <= 0:
+        return
+    _validator_stop.clear()
+    threading.Thread(target=_validator_loop, name="pool-validator", daemon=True).start()
+
+def stop_pool_validator():
+    _validator_stop.set()
+
+def pool_stats() -> dict:
+    stats = {}
+    for name, (engine, _) in ENGINES.items():
+        pool = engine.pool
+        config = POOL_CONFIG[name]
+        stats[name] = {
+            "size": config["pool_size"],
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": config["max_overflow"],
+            "exhausted": pool.checkedout() >= config["pool_size"] + config["max_overflow"],
+            **_POOL_COUNTERS[name],
+        }
+    return stats
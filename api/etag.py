@@ -0,0 +1,93 @@
+import os
+import time
+import hashlib
+import logging
+from typing import Optional
+from sqlalchemy import text
+
+from .cache import get_client
+
+logger = logging.getLogger(__name__)
+
+# Modo de geração do ETag (ENV):
+#   checksum -> sinal de mudança por tabela via probe (ETAG_PROBE), sem rodar a consulta completa
+#   content  -> hash do conteúdo retornado (só evita transferência/serialização)
+#   off      -> sem ETag
+ETAG_MODE = os.getenv("ETAG_MODE", "checksum").lower()
+ETAG_PROBE_TTL_SEC = int(os.getenv("ETAG_PROBE_TTL_SEC", "5"))
+# Probe que falhou (ex.: view sem R_E_C_N_O_) não é repetido a cada requisição
+ETAG_PROBE_FAILURE_TTL_SEC = int(os.getenv("ETAG_PROBE_FAILURE_TTL_SEC", "300"))
+# recno/count não enxergam UPDATE in-place; o sinal gira pelo menos a cada N segundos
+ETAG_MAX_STALE_SEC = int(os.getenv("ETAG_MAX_STALE_SEC", "300"))
+
+# Probes disponíveis. recno (padrão) usa a chave do Protheus; checksum lê todas as
+# linhas (full scan) e só deve ser ativado por tabela quando a view for pequena.
+PROBES = {
+    "recno": "SELECT MAX(R_E_C_N_O_) AS r, COUNT_BIG(*) AS n FROM {table}",
+    "checksum": "SELECT COUNT_BIG(*) AS n, CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS ck FROM {table}",
+}
+ETAG_PROBE = os.getenv("ETAG_PROBE", "recno").lower()
+
+def _probe_sql(table_name: str) -> str:
+    """
+    Consulta de sinal de mudança da tabela:
+    - ETAG_PROBE_SQL_<TABLE>: SQL próprio (ex.: rowversion exposto pela view)
+    - ETAG_PROBE_<TABLE>=recno|checksum: probe pré-definido por tabela
+    - ETAG_PROBE: padrão global (recno)
+    """
+    custom = os.getenv(f"ETAG_PROBE_SQL_{table_name}")
+    if custom:
+        return custom.format(table=table_name)
+    probe = os.getenv(f"ETAG_PROBE_{table_name}", ETAG_PROBE).lower()
+    return PROBES[probe].format(table=table_name)
+
+def table_signal(engine, table_name: str) -> Optional[str]:
+    """
+    Sinal barato de versão da tabela. Resultado fica alguns segundos no Redis para
+    absorver rajadas de pollers. Retorna None se o probe falhar (sem ETag).
+    """
+    key = f"rc:sig:{table_name}"
+    try:
+        cached = get_client().get(key)
+        if cached is not None:
+            return cached.decode() or None
+    except Exception as e:
+        logger.warning(f"Cache indisponível (signal): {e}")
+
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(text(_probe_sql(table_name))).fetchone()
+        signal = "|".join(str(v) for v in row)
+        if ETAG_MAX_STALE_SEC > 0:
+            signal += f"|{int(time.time()) // ETAG_MAX_STALE_SEC}"
+        ttl = ETAG_PROBE_TTL_SEC
+    except Exception as e:
+        logger.warning(f"Probe de ETag falhou para {table_name}: {e}")
+        signal, ttl = None, ETAG_PROBE_FAILURE_TTL_SEC
+
+    if ttl > 0:
+        try:
+            get_client().setex(key, ttl, (signal or "").encode())
+        except Exception as e:
+            logger.warning(f"Cache indisponível (signal): {e}")
+    return signal
+
+def make_etag(*parts) -> str:
+    """ETag fraco: o corpo muda em execution_time/timestamp e no Content-Encoding."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Comparação fraca (RFC 9110 §13.1.2) contra a lista do If-None-Match."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
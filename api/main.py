@@ -1,21 +1,32 @@
 from fastapi import FastAPI, Depends, HTTPException, Security, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from pydantic import BaseModel
-import pandas as pd
-import numpy as np
 import os
+import threading
+import time
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+from datetime import datetime, date, time as dt_time, timedelta
+from typing import Optional, Dict, Callable, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
 import hashlib
 import uuid
 
-from .db import data_engine, init_policy_schema
+from .db import data_engine, POOL_CONFIG, init_policy_schema, warm_pools, start_pool_validator, stop_pool_validator, pool_stats
 from .rate_limiter import check_rate_limit
+from .rollup import start_rollup_worker, stop_rollup_worker
+from .retention import start_retention_worker, stop_retention_worker
+from . import cache
+from .etag import ETAG_MODE, table_signal, make_etag, etag_matches
+from .aggregate import table_columns, parse_group_by, parse_measures, build_aggregate_query, AGGREGATE_MAX_GROUPS
+from .compression import (
+    negotiate_encoding, compress, compress_stream, iter_json_payload, dumps,
+    COMPRESSION_MIN_BYTES, STREAM_CHUNK_ROWS,
+)
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +43,18 @@ DB_COMMAND_TIMEOUT    = int(os.getenv("DB_COMMAND_TIMEOUT", "600"))
 POOL_TIMEOUT          = int(os.getenv("POOL_TIMEOUT", "300"))
 HTTP_TIMEOUT          = int(os.getenv("HTTP_TIMEOUT", "900"))
 
+# Batch: consultas em paralelo, cada uma em sua própria conexão do pool
+# Threads = conexões que o pool de dados consegue entregar (pool_size + max_overflow);
+# mais que isso só esperaria no pool. Um batch nunca passa do número de threads, então
+# suas consultas rodam todas ao mesmo tempo (latência = consulta mais lenta).
+_DATA_POOL_CAPACITY = POOL_CONFIG["data_engine"]["pool_size"] + POOL_CONFIG["data_engine"]["max_overflow"]
+BATCH_MAX_WORKERS  = min(int(os.getenv("BATCH_MAX_WORKERS", str(_DATA_POOL_CAPACITY))), _DATA_POOL_CAPACITY)
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10"))
+if BATCH_MAX_REQUESTS > BATCH_MAX_WORKERS:
+    logger.warning(f"BATCH_MAX_REQUESTS={BATCH_MAX_REQUESTS} > BATCH_MAX_WORKERS={BATCH_MAX_WORKERS}; limitado a {BATCH_MAX_WORKERS}.")
+    BATCH_MAX_REQUESTS = BATCH_MAX_WORKERS
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="batch")
+
 # Base de usuários (exemplo; para produção, mover para DB)
 USERS_DB = {
     "admin": {
@@ -51,6 +74,16 @@ USERS_DB = {
     }
 }
 
+# Rotas de dados -> views no Protheus
+DATA_TABLES = {
+    "carteira-logistica": "CARTEIRA_LOGISTICA",
+    "mov-estoque-logistica": "MOV_ESTOQUE_LOGISTICA",
+    "docas-logistica": "DOCAS_LOGISTICA",
+    "pedidos-romaneio-logistica": "PEDIDOS_ROMANEIO_LOGISTICA",
+    "carregamento-logistica": "CARREGAMENTO_LOGISTICA",
+    "faturamento-logistica": "FATURAMENTO_LOGISTICA",
+}
+
 ACTIVE_TOKENS: Dict[str, dict] = {}
 security = HTTPBearer()
 
@@ -64,6 +97,15 @@ class LoginResponse(BaseModel):
     role: str
     expires_at: str
 
+class BatchItem(BaseModel):
+    table: str
+    limit: Optional[int] = None
+    offset: Optional[int] = 0
+    status_filter: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
 app = FastAPI(
     title="Suprema API",
     description="API - fontes de dados homologadas",
@@ -76,6 +118,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache"],
 )
 
 def hash_password(password: str) -> str:
@@ -105,20 +148,54 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
         raise HTTPException(status_code=401, detail="Token expirado")
     return token_data
 
-@app.on_event("startup")
-def on_startup():
+# Startup: background (padrão) libera a porta na hora e faz schema + warm-up em thread;
+# sync faz tudo antes de aceitar requisições; off não abre conexão nenhuma no startup.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+STARTUP_STATE = {"mode": STARTUP_WARMUP, "done": False, "elapsed_sec": None}
+
+def run_startup_tasks():
+    started = time.perf_counter()
     # Evita travar a API se o BISOBEL estiver indisponível
     init_on_start = os.getenv("INIT_POLICY_ON_STARTUP", "true").lower() == "true"
     if not init_on_start:
         logger.warning("INIT_POLICY_ON_STARTUP=false -> pulando init_policy_schema() no startup.")
-        return
+    else:
+        # Execução protegida: não deixar derrubar/pendurar a API
+        try:
+            force = os.getenv("INIT_POLICY_FORCE", "false").lower() == "true"
+            if init_policy_schema(force=force):
+                logger.info("Schema de políticas inicializado (BISOBEL).")
+        except Exception as e:
+            logger.error(f"Falha ao inicializar schema de políticas: {e}")
+
+    # Conexões prontas antes das primeiras consultas
+    warm_pools()
+    STARTUP_STATE["done"] = True
+    STARTUP_STATE["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Startup concluído em {STARTUP_STATE['elapsed_sec']}s (modo {STARTUP_WARMUP}).")
 
-    # Execução protegida: não deixar derrubar/pendurar a API
-    try:
-        init_policy_schema()
-        logger.info("Schema de políticas inicializado (BISOBEL).")
-    except Exception as e:
-        logger.error(f"Falha ao inicializar schema de políticas: {e}")
+@app.on_event("startup")
+def on_startup():
+    # Validação periódica dos pools e jobs de rate_limit_event em background
+    start_pool_validator()
+    # Contadores agregados de rate_limit_event para o admin (Relatórios)
+    start_rollup_worker()
+    # Arquivamento (Parquet) + expurgo em lotes de eventos antigos
+    start_retention_worker()
+
+    if STARTUP_WARMUP == "off":
+        logger.warning("STARTUP_WARMUP=off -> schema e warm-up pulados no startup.")
+    elif STARTUP_WARMUP == "sync":
+        run_startup_tasks()
+    else:
+        threading.Thread(target=run_startup_tasks, name="startup-warmup", daemon=True).start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_pool_validator()
+    stop_rollup_worker()
+    stop_retention_worker()
+    batch_executor.shutdown(wait=False)
 
 def get_current_user(request: Request, token_data: dict = Depends(verify_token)) -> dict:
     """Obtém usuário atual e aplica rate limit Redis + políticas do BISOBEL"""
@@ -140,6 +217,9 @@ def get_db_connection_engine():
     return data_engine
 
 def safe_convert_value(value):
+    # pandas/numpy só são importados no primeiro uso (startup rápido)
+    import numpy as np
+    import pandas as pd
     if value is None:
         return None
     elif pd.isna(value):
@@ -152,8 +232,10 @@ def safe_convert_value(value):
         return float(value)
     elif isinstance(value, Decimal):
         return float(value)
-    elif isinstance(value, (pd.Timestamp, datetime)):
+    elif isinstance(value, (pd.Timestamp, datetime, date, dt_time)):
         return value.isoformat()
+    elif isinstance(value, uuid.UUID):
+        return str(value)
     elif isinstance(value, bytes):
         try:
             return value.decode('utf-8')
@@ -185,6 +267,7 @@ def convert_to_json_safe(df):
     return records
 
 def execute_table_query(table_name: str, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None):
+    import pandas as pd
     start_time = datetime.now()
     try:
         engine = get_db_connection_engine()
@@ -201,6 +284,14 @@ def execute_table_query(table_name: str, limit: Optional[int] = None, offset: Op
         cleaned_df, problematic_columns = clean_dataframe_robust(df)
         records = convert_to_json_safe(cleaned_df)
         exec_time = (datetime.now() - start_time).total_seconds()
+        data_info = {
+            "columns_count": len(df.columns),
+            "problematic_columns": problematic_columns,
+            "original_row_count": len(df)
+        }
+        if ETAG_MODE == "content":
+            row_hashes = pd.util.hash_pandas_object(cleaned_df.astype(str), index=False).values
+            data_info["content_hash"] = hashlib.sha1(row_hashes.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()
         return {
             "success": True,
             "table": table_name,
@@ -209,11 +300,7 @@ def execute_table_query(table_name: str, limit: Optional[int] = None, offset: Op
             "execution_time": exec_time,
             "timestamp": datetime.now().isoformat(),
             "strategy_used": "robust_cleaning",
-            "data_info": {
-                "columns_count": len(df.columns),
-                "problematic_columns": problematic_columns,
-                "original_row_count": len(df)
-            }
+            "data_info": data_info
         }
     except SQLAlchemyError as e:
         exec_time = (datetime.now() - start_time).total_seconds()
@@ -222,6 +309,140 @@ def execute_table_query(table_name: str, limit: Optional[int] = None, offset: Op
         exec_time = (datetime.now() - start_time).total_seconds()
         return {"success": False, "error": "Erro interno", "details": str(e), "execution_time": exec_time}
 
+def execute_aggregate_query(table_name: str, group_by: list, measures: list, status_filter: Optional[str] = None):
+    """GROUP BY executado no SQL Server; retorna só as linhas agregadas."""
+    start_time = datetime.now()
+    try:
+        engine = get_db_connection_engine()
+        sql, params = build_aggregate_query(table_name, table_columns(engine, table_name), group_by, measures, status_filter)
+        with engine.connect() as conn:
+            result = conn.execute(text(sql), params)
+            columns = list(result.keys())
+            rows = result.fetchmany(AGGREGATE_MAX_GROUPS + 1)
+        truncated = len(rows) > AGGREGATE_MAX_GROUPS
+        if truncated:
+            logger.warning(f"Agregação de {table_name} cortada em {AGGREGATE_MAX_GROUPS} grupos (group_by={group_by})")
+            rows = rows[:AGGREGATE_MAX_GROUPS]
+        records = [{col: safe_convert_value(v) for col, v in zip(columns, row)} for row in rows]
+        exec_time = (datetime.now() - start_time).total_seconds()
+        return {
+            "success": True,
+            "table": table_name,
+            "group_by": group_by,
+            "measures": [f"{func}:{col}" for func, col in measures],
+            "data": records,
+            "count": len(records),
+            "truncated": truncated,
+            "execution_time": exec_time,
+            "timestamp": datetime.now().isoformat(),
+        }
+    except SQLAlchemyError as e:
+        exec_time = (datetime.now() - start_time).total_seconds()
+        return {"success": False, "error": "Erro na consulta SQL", "details": str(e), "execution_time": exec_time}
+
+def response_headers(encoding: Optional[str], cache_status: str, etag: Optional[str]) -> dict:
+    headers = {"Vary": "Accept-Encoding", "X-Cache": cache_status}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+def resolve_cache_key(cache_name: str, table_name: str, params: dict) -> tuple:
+    """
+    Chave de cache + ETag (modo checksum). Com o sinal da tabela na chave, o cache
+    é invalidado assim que a tabela muda.
+    """
+    etag = None
+    if ETAG_MODE == "checksum":
+        signal = table_signal(get_db_connection_engine(), table_name)
+        if signal is not None:
+            etag = make_etag(cache_name, sorted(params.items()), signal)
+    return cache.make_key(cache_name, etag=etag, **params), etag
+
+def load_identity_payload(cache_name: str, table_name: str, params: dict, run_query: Callable[[], dict]) -> tuple:
+    """
+    JSON sem compressão de uma consulta, lido do mesmo cache de serve_cached (entrada
+    identity) ou executado e gravado nele. Retorna (body, success, "HIT" | "MISS").
+    """
+    key, _ = resolve_cache_key(cache_name, table_name, params)
+    body, _ = cache.get_payload(key, None)
+    if body is not None:
+        return body, True, "HIT"
+    payload = run_query()
+    body = b"".join(iter_json_payload(payload))
+    success = payload.get("success", False)
+    if success:
+        cache.set_payload(key, None, body)
+    return body, success, "MISS"
+
+def serve_cached(request: Request, cache_name: str, table_name: str, params: dict, run_query: Callable[[], dict]):
+    """
+    Resposta das rotas de dados com ETag, compressão negociada (zstd/br/gzip) e cache.
+    - ETag (ETAG_MODE=checksum): derivado de um probe barato da tabela; If-None-Match
+      igual -> 304 sem executar a consulta nem serializar
+    - HIT: devolve o payload já comprimido do Redis, sem custo de CPU de compressão
+    - MISS: executa run_query(); payloads grandes saem em stream (chunked) e o
+      resultado comprimido é gravado no cache ao final do envio
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if_none_match = request.headers.get("if-none-match")
+
+    key, etag = resolve_cache_key(cache_name, table_name, params)
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    if ETAG_MODE == "content":
+        etag = cache.get_etag(key)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    body, body_encoding = cache.get_payload(key, encoding)
+    if body is not None:
+        if encoding and body_encoding is None and len(body) >= COMPRESSION_MIN_BYTES:
+            # Só havia a versão identity (gravada por um cliente sem Accept-Encoding)
+            body, body_encoding = compress(body, encoding), encoding
+            cache.set_payload(key, encoding, body)
+        return Response(content=body, media_type="application/json", headers=response_headers(body_encoding, "HIT", etag))
+
+    payload = run_query()
+    cacheable = payload.get("success", False)
+
+    if ETAG_MODE == "content" and cacheable:
+        content_hash = payload.get("data_info", {}).get("content_hash") or hashlib.sha1(dumps(payload["data"])).hexdigest()
+        etag = make_etag(cache_name, sorted(params.items()), content_hash)
+        cache.set_etag(key, etag)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    if not cacheable:
+        etag = None
+
+    if payload.get("count", 0) <= STREAM_CHUNK_ROWS:
+        body = b"".join(iter_json_payload(payload))
+        if len(body) < COMPRESSION_MIN_BYTES:
+            encoding = None
+        else:
+            body = compress(body, encoding)
+        if cacheable:
+            cache.set_payload(key, encoding, body)
+        return Response(content=body, media_type="application/json", headers=response_headers(encoding, "MISS", etag))
+
+    def stream():
+        sink = []
+        yield from compress_stream(iter_json_payload(payload), encoding, sink)
+        if cacheable:
+            cache.set_payload(key, encoding, b"".join(sink))
+
+    return StreamingResponse(stream(), media_type="application/json", headers=response_headers(encoding, "MISS", etag))
+
+def serve_table(request: Request, table_name: str, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None):
+    params = dict(limit=limit, offset=offset, status_filter=status_filter)
+    return serve_cached(request, table_name, table_name, params,
+                        lambda: execute_table_query(table_name, limit, offset, status_filter))
+
 @app.post("/login", response_model=LoginResponse)
 async def login(login_data: LoginRequest):
     username = login_data.username
@@ -251,7 +472,8 @@ async def root():
         "admin_app": "Streamlit (/admin externo)",
         "endpoints": [
             "/carteira-logistica", "/mov-estoque-logistica", "/docas-logistica",
-            "/pedidos-romaneio-logistica", "/carregamento-logistica", "/faturamento-logistica"
+            "/pedidos-romaneio-logistica", "/carregamento-logistica", "/faturamento-logistica",
+            "/aggregate/{table}", "/batch"
         ]
     }
 
@@ -260,33 +482,117 @@ async def health():
     try:
         with data_engine.connect() as conn:
             conn.execute(text("SELECT 1"))
-        return {"status": "healthy"}
+        return {"status": "healthy", "startup": STARTUP_STATE, "pools": pool_stats()}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+        return {"status": "unhealthy", "error": str(e), "startup": STARTUP_STATE, "pools": pool_stats()}
 
 @app.get("/carteira-logistica")
 async def get_carteira_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("CARTEIRA_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "CARTEIRA_LOGISTICA", limit, offset, status_filter)
 
 @app.get("/mov-estoque-logistica")
 async def get_mov_estoque_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("MOV_ESTOQUE_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "MOV_ESTOQUE_LOGISTICA", limit, offset, status_filter)
 
 @app.get("/docas-logistica")
 async def get_docas_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("DOCAS_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "DOCAS_LOGISTICA", limit, offset, status_filter)
 
 @app.get("/pedidos-romaneio-logistica")
 async def get_pedidos_romaneio_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("PEDIDOS_ROMANEIO_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "PEDIDOS_ROMANEIO_LOGISTICA", limit, offset, status_filter)
 
 @app.get("/carregamento-logistica")
 async def get_carregamento_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("CARREGAMENTO_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "CARREGAMENTO_LOGISTICA", limit, offset, status_filter)
 
 @app.get("/faturamento-logistica")
 async def get_faturamento_logistica(request: Request, limit: Optional[int] = None, offset: Optional[int] = 0, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
-    return execute_table_query("FATURAMENTO_LOGISTICA", limit, offset, status_filter)
+    return serve_table(request, "FATURAMENTO_LOGISTICA", limit, offset, status_filter)
+
+@app.get("/aggregate/{table}")
+async def get_aggregate(request: Request, table: str, group_by: Optional[str] = None, measures: Optional[str] = None, status_filter: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Totais calculados no SQL Server, ex.:
+    /aggregate/faturamento-logistica?group_by=FILIAL,STATUS&measures=count:*,sum:VALOR
+    Dimensões/medidas restritas às colunas da view; funções: sum, count, min, max.
+    """
+    table_name = DATA_TABLES.get(table.lower())
+    if not table_name:
+        raise HTTPException(status_code=404, detail=f"Tabela não disponível para agregação: {table}")
+    dims = parse_group_by(group_by)
+    meas = parse_measures(measures)
+    try:
+        build_aggregate_query(table_name, table_columns(get_db_connection_engine(), table_name), dims, meas, status_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SQLAlchemyError as e:
+        return {"success": False, "error": "Erro na consulta SQL", "details": str(e)}
+    params = dict(group_by=",".join(dims), measures=",".join(f"{f}:{c}" for f, c in meas), status_filter=status_filter)
+    return serve_cached(request, f"agg:{table_name}", table_name, params,
+                        lambda: execute_aggregate_query(table_name, dims, meas, status_filter))
+
+def run_batch_item(index: int, item: BatchItem, username: str, role: str) -> tuple:
+    """
+    Uma consulta do batch; o rate limit continua valendo por endpoint e o resultado
+    passa pelo mesmo cache das rotas GET. Retorna (success, JSON do item).
+    """
+    def error(table: str, status_code: int, message: str) -> tuple:
+        return False, dumps({"index": index, "table": table, "success": False, "status_code": status_code, "error": message})
+
+    table_name = DATA_TABLES.get(item.table.strip("/").lower())
+    if not table_name:
+        return error(item.table, 404, "Tabela não disponível")
+    try:
+        check_rate_limit(username=username, role=role, endpoint=f"/{item.table.strip('/').lower()}")
+    except PermissionError as e:
+        return error(table_name, 429, str(e))
+    params = dict(limit=item.limit, offset=item.offset, status_filter=item.status_filter)
+    body, success, cache_status = load_identity_payload(
+        table_name, table_name, params,
+        lambda: execute_table_query(table_name, item.limit, item.offset, item.status_filter),
+    )
+    # Insere index/cache no objeto já serializado, sem decodificar o payload
+    return success, dumps({"index": index, "cache": cache_status})[:-1] + b"," + body[1:]
+
+@app.post("/batch")
+def post_batch(request: Request, batch: BatchRequest, stream: bool = False, token_data: dict = Depends(verify_token)):
+    """
+    Várias views em uma chamada: uma autenticação, consultas em paralelo.
+    - padrão: JSON único com "results" na ordem do pedido
+    - stream=true: NDJSON, uma linha por consulta na ordem de conclusão
+    Rota síncrona de propósito: o FastAPI a executa no threadpool e a espera
+    pelas consultas não bloqueia o event loop.
+    """
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma consulta")
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BATCH_MAX_REQUESTS} consultas por batch")
+
+    start_time = datetime.now()
+    username, role = token_data["username"], token_data["role"]
+    futures = [batch_executor.submit(run_batch_item, i, item, username, role) for i, item in enumerate(batch.requests)]
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    if stream:
+        def lines():
+            for future in as_completed(futures):
+                yield future.result()[1] + b"\n"
+        return StreamingResponse(compress_stream(lines(), encoding, flush=True), media_type="application/x-ndjson",
+                                 headers=response_headers(encoding, "BYPASS", None))
+
+    results = [future.result() for future in futures]
+    head = dumps({
+        "success": all(success for success, _ in results),
+        "count": len(results),
+        "execution_time": (datetime.now() - start_time).total_seconds(),
+        "timestamp": datetime.now().isoformat(),
+    })
+    body = head[:-1] + b',"results":[' + b",".join(item for _, item in results) + b"]}"
+    if len(body) < COMPRESSION_MIN_BYTES:
+        encoding = None
+    return Response(content=compress(body, encoding), media_type="application/json",
+                    headers=response_headers(encoding, "BYPASS", None))
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, Boolean, DateTime, Text
+from sqlalchemy import String, Integer, BigInteger, Boolean, DateTime, Text, Index, func
 from datetime import datetime
 
 class Base(DeclarativeBase):
@@ -44,8 +44,13 @@ class RateLimitBlock(Base):
 
 class RateLimitEvent(Base):
     __tablename__ = "rate_limit_event"
-    id: Mapped[int] = mapped_column(primary_key=True)
-    ts: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow)
+    __table_args__ = (
+        # Índice estreito: retenção (api/retention.py) e filtro detalhado do admin
+        Index("IX_rate_limit_event_ts", "ts"),
+    )
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # Relógio do SQL Server, no próprio INSERT: mesmo relógio do corte do rollup (api/rollup.py)
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=func.sysutcdatetime())
     username: Mapped[str] = mapped_column(String(100))
     role: Mapped[str] = mapped_column(String(50))
     endpoint: Mapped[str] = mapped_column(String(200))
@@ -56,3 +61,25 @@ class RateLimitEvent(Base):
     block_sec: Mapped[int | None] = mapped_column(Integer)
     calls: Mapped[int | None] = mapped_column(Integer)
     reason: Mapped[str | None] = mapped_column(String(200))
+
+class RateLimitEventRollup(Base):
+    """Contadores pré-agregados de rate_limit_event (minute | hour | day), lidos pelo admin."""
+    __tablename__ = "rate_limit_event_rollup"
+    __table_args__ = (
+        Index("UX_rate_limit_event_rollup_key", "granularity", "bucket_ts", "username", "role", "endpoint", "decision", unique=True),
+    )
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(10), nullable=False)  # minute | hour | day
+    bucket_ts: Mapped[datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+    username: Mapped[str] = mapped_column(String(100), nullable=False)
+    role: Mapped[str] = mapped_column(String(50), nullable=False)
+    endpoint: Mapped[str] = mapped_column(String(200), nullable=False)
+    decision: Mapped[str] = mapped_column(String(20), nullable=False)
+    events: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+class RateLimitRollupState(Base):
+    """Marca d'água do rollup: último rate_limit_event.id já agregado."""
+    __tablename__ = "rate_limit_rollup_state"
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
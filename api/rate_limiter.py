@@ -1,13 +1,19 @@
 import os, time, random
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from redis import Redis
 from sqlalchemy import select, and_, or_, desc
 from .db import PolicySessionLocal
 from .models import RateLimitPolicy, RateLimitEvent, RateLimitBlock
 
-# Redis
-redis_client = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+# Redis (criado no primeiro uso, não no import)
+_redis_client = None
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        from redis import Redis
+        _redis_client = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+    return _redis_client
 
 # Fallbacks (ENV)
 FALLBACK_ENABLED = os.getenv("USER_RATE_LIMIT_ENABLED", "true").lower() == "true"
@@ -135,6 +141,8 @@ def check_rate_limit(username: str, role: str, endpoint: str):
     key = f"rl:{username}:{endpoint}:{window_id}"
     block_key = f"rl:block:{username}:{endpoint}"
 
+    redis_client = get_redis()
+
     # Bloqueio ativo em Redis?
     ttl_block = redis_client.ttl(block_key)
     if ttl_block and ttl_block > 0:
@@ -0,0 +1,187 @@
+"""
+Retenção de rate_limit_event: arquiva eventos antigos em Parquet e apaga em lotes.
+
+Roda em background na API (RETENTION_INTERVAL_SEC) e pode ser executado avulso:
+    python -m api.retention
+- Só sai da tabela o que já passou pelo rollup (id <= marca d'água de api.rollup);
+  com ROLLUP_ENABLED=false não há essa trava
+- Arquivo por lote e por dia do ts: <RETENTION_ARCHIVE_DIR>/rate_limit_event/<AAAA-MM-DD>/events_<id_ini>_<id_fim>.parquet;
+  uma rodada retomada após queda não regrava linhas que já estão em arquivo
+- DELETE TOP (n) pela chave clusterizada, uma transação curta por lote, sem escalar lock
+- Rollups de granularidade minute também são podados (ROLLUP_MINUTE_RETENTION_DAYS)
+"""
+import os
+import time
+import logging
+import threading
+import importlib.util
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import text
+
+from .db import policy_engine
+from .rollup import ROLLUP_ENABLED
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "true").lower() == "true"
+RETENTION_INTERVAL_SEC = int(os.getenv("RETENTION_INTERVAL_SEC", "3600"))
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "30"))
+RETENTION_ARCHIVE = os.getenv("RETENTION_ARCHIVE", "true").lower() == "true"
+RETENTION_ARCHIVE_DIR = Path(os.getenv("RETENTION_ARCHIVE_DIR", str(Path(__file__).resolve().parents[1] / "archive")))
+RETENTION_ARCHIVE_ROWS = int(os.getenv("RETENTION_ARCHIVE_ROWS", "100000"))
+# < 5000 linhas por DELETE evita escalar para lock de tabela no SQL Server
+RETENTION_DELETE_BATCH = int(os.getenv("RETENTION_DELETE_BATCH", "4000"))
+RETENTION_DELETE_PAUSE_MS = int(os.getenv("RETENTION_DELETE_PAUSE_MS", "50"))
+ROLLUP_MINUTE_RETENTION_DAYS = int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "7"))
+
+_NO_WATERMARK = 2 ** 63 - 1
+
+_stop = threading.Event()
+
+def _rollup_watermark(conn) -> Optional[int]:
+    """Último id agregado pelo rollup; None se o rollup nunca rodou."""
+    row = conn.execute(
+        text("SELECT last_event_id FROM dbo.rate_limit_rollup_state WHERE name = 'rate_limit_event'")
+    ).fetchone()
+    return int(row[0]) if row else None
+
+def _delete_in_batches(sql: str, params: dict, interruptible: bool = True) -> int:
+    """
+    Repete um DELETE TOP (:batch) em transações curtas até não sobrar nada.
+    interruptible=False ignora o stop: usado para terminar um intervalo já arquivado.
+    """
+    total = 0
+    while not (interruptible and _stop.is_set()):
+        with policy_engine.begin() as conn:
+            deleted = conn.execute(text(sql), {**params, "batch": RETENTION_DELETE_BATCH}).rowcount
+        total += deleted
+        if deleted < RETENTION_DELETE_BATCH:
+            break
+        if RETENTION_DELETE_PAUSE_MS:
+            time.sleep(RETENTION_DELETE_PAUSE_MS / 1000)
+    return total
+
+def _archived_ids(day_dir: Path, first_id: int, last_id: int) -> set:
+    """Ids já gravados em arquivos do dia cujo intervalo cruza [first_id, last_id]."""
+    import pyarrow.parquet as pq
+    ids = set()
+    for path in day_dir.glob("events_*_*.parquet"):
+        try:
+            lo, hi = (int(part) for part in path.stem.split("_")[1:3])
+        except ValueError:
+            continue
+        if lo <= last_id and hi >= first_id:
+            ids.update(pq.read_table(path, columns=["id"]).column("id").to_pylist())
+    return ids
+
+def _archive_chunk(df) -> List[Path]:
+    """
+    Um arquivo por dia do lote. Linhas que já estão em um arquivo (rodada anterior
+    interrompida entre o Parquet e o DELETE) não são gravadas de novo.
+    """
+    # pyarrow/pandas só entram quando há o que arquivar
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    paths = []
+    days = pd.to_datetime(df["ts"]).dt.strftime("%Y-%m-%d")
+    for day, part in df.groupby(days, sort=True):
+        day_dir = RETENTION_ARCHIVE_DIR / "rate_limit_event" / day
+        archived = _archived_ids(day_dir, int(part["id"].iloc[0]), int(part["id"].iloc[-1]))
+        if archived:
+            part = part[~part["id"].isin(archived)]
+            logger.info(f"{len(archived)} eventos de {day} já estavam arquivados; não serão regravados")
+            if part.empty:
+                continue
+        first_id, last_id = int(part["id"].iloc[0]), int(part["id"].iloc[-1])
+        path = day_dir / f"events_{first_id}_{last_id}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".parquet.tmp")
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp, compression="zstd")
+        tmp.replace(path)
+        paths.append(path)
+    return paths
+
+def purge_events_once(cutoff: datetime) -> int:
+    """Arquiva + apaga um lote de eventos anteriores a `cutoff`. Retorna linhas removidas."""
+    import pandas as pd
+    with policy_engine.connect() as conn:
+        if ROLLUP_ENABLED:
+            watermark = _rollup_watermark(conn)
+            if watermark is None:
+                logger.warning("Retenção aguardando o rollup: dbo.rate_limit_rollup_state sem registro; nada será apagado.")
+                return 0
+        else:
+            # Sem rollup não há o que preservar para os relatórios
+            watermark = _NO_WATERMARK
+        df = pd.read_sql(
+            text("""
+                SELECT TOP (:n) * FROM dbo.rate_limit_event
+                WHERE ts < :cutoff AND id <= :watermark
+                ORDER BY id
+            """),
+            conn, params={"n": RETENTION_ARCHIVE_ROWS, "cutoff": cutoff, "watermark": watermark},
+        )
+    if df.empty:
+        return 0
+    first_id, last_id = int(df["id"].iloc[0]), int(df["id"].iloc[-1])
+    if RETENTION_ARCHIVE:
+        paths = _archive_chunk(df)
+        logger.info(f"Arquivados {len(df)} eventos em {', '.join(str(p) for p in paths) or 'arquivos existentes'}")
+    return _delete_in_batches(
+        """
+        DELETE TOP (:batch) FROM dbo.rate_limit_event
+        WHERE id >= :first_id AND id <= :last_id AND ts < :cutoff
+        """,
+        {"first_id": first_id, "last_id": last_id, "cutoff": cutoff},
+        # O intervalo já está no Parquet: apagar até o fim, senão a próxima rodada o arquivaria de novo
+        interruptible=False,
+    )
+
+def purge_minute_rollups(cutoff: datetime) -> int:
+    return _delete_in_batches(
+        """
+        DELETE TOP (:batch) FROM dbo.rate_limit_event_rollup
+        WHERE granularity = 'minute' AND bucket_ts < :cutoff
+        """,
+        {"cutoff": cutoff},
+    )
+
+def run_retention() -> dict:
+    if RETENTION_ARCHIVE and importlib.util.find_spec("pyarrow") is None:
+        # Sem pyarrow não há arquivo: não apagar nada
+        logger.error("RETENTION_ARCHIVE=true mas pyarrow não está instalado; retenção ignorada.")
+        return {"events": 0, "minute_rollups": 0}
+    now = datetime.utcnow()
+    events = 0
+    while not _stop.is_set():
+        removed = purge_events_once(now - timedelta(days=RETENTION_DAYS))
+        if not removed:
+            break
+        events += removed
+    rollups = purge_minute_rollups(now - timedelta(days=ROLLUP_MINUTE_RETENTION_DAYS))
+    return {"events": events, "minute_rollups": rollups}
+
+def _retention_loop():
+    while not _stop.wait(RETENTION_INTERVAL_SEC):
+        try:
+            result = run_retention()
+            if result["events"] or result["minute_rollups"]:
+                logger.info(f"Retenção: {result}")
+        except Exception as e:
+            logger.error(f"Falha na retenção de rate_limit_event: {e}")
+
+def start_retention_worker():
+    if not RETENTION_ENABLED or RETENTION_INTERVAL_SEC <= 0:
+        return
+    _stop.clear()
+    threading.Thread(target=_retention_loop, name="rate-limit-retention", daemon=True).start()
+
+def stop_retention_worker():
+    _stop.set()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Retenção concluída: {run_retention()}")
@@ -0,0 +1,134 @@
+"""
+Rollup de rate_limit_event -> rate_limit_event_rollup (minute/hour/day).
+
+Roda em background na API (ROLLUP_INTERVAL_SEC) e pode ser executado avulso:
+    python -m api.rollup
+Cada rodada agrega os eventos com id > marca d'água e avança a marca na mesma
+transação; se outro worker já avançou, a rodada é descartada (sem contagem dupla).
+O lote termina antes do primeiro evento com ts dentro de ROLLUP_SETTLE_SEC; ts e o
+corte usam o relógio do SQL Server (SYSUTCDATETIME), não o do host da API.
+"""
+import os
+import logging
+import threading
+from sqlalchemy import text
+
+from .db import policy_engine
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "true").lower() == "true"
+ROLLUP_INTERVAL_SEC = int(os.getenv("ROLLUP_INTERVAL_SEC", "60"))
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "200000"))
+# Eventos mais novos que isso ficam para a próxima rodada (commits ainda em voo)
+ROLLUP_SETTLE_SEC = int(os.getenv("ROLLUP_SETTLE_SEC", "5"))
+
+STATE_NAME = "rate_limit_event"
+
+# Truncamento do ts por granularidade (T-SQL)
+_BUCKETS = {
+    "minute": "DATEADD(minute, DATEDIFF(minute, 0, ts), 0)",
+    "hour": "DATEADD(hour, DATEDIFF(hour, 0, ts), 0)",
+    "day": "CAST(CAST(ts AS DATE) AS DATETIME2)",
+}
+
+_MERGE_SQL = """
+MERGE dbo.rate_limit_event_rollup WITH (HOLDLOCK) AS t
+USING (
+    SELECT {bucket} AS bucket_ts, username, role, endpoint, decision, COUNT_BIG(*) AS events
+    FROM dbo.rate_limit_event
+    WHERE id > :from_id AND id <= :to_id
+    GROUP BY {bucket}, username, role, endpoint, decision
+) AS s
+ON t.granularity = :granularity AND t.bucket_ts = s.bucket_ts AND t.username = s.username
+   AND t.role = s.role AND t.endpoint = s.endpoint AND t.decision = s.decision
+WHEN MATCHED THEN
+    UPDATE SET events = t.events + s.events
+WHEN NOT MATCHED THEN
+    INSERT (granularity, bucket_ts, username, role, endpoint, decision, events)
+    VALUES (:granularity, s.bucket_ts, s.username, s.role, s.endpoint, s.decision, s.events);
+"""
+
+# Fim do lote: para antes do primeiro evento ainda não assentado. Ids não seguem a ordem
+# de ts entre requisições concorrentes; um MAX(id) dos assentados pularia esse evento
+# e a marca d'água passaria por cima dele (nunca agregado, depois apagado pela retenção).
+_TO_ID_SQL = """
+WITH unsettled AS (
+    SELECT MIN(id) AS id FROM dbo.rate_limit_event
+    WHERE id > :from_id AND ts >= DATEADD(second, -:settle, SYSUTCDATETIME())
+)
+SELECT MAX(b.id) FROM (
+    SELECT TOP (:batch) e.id FROM dbo.rate_limit_event AS e CROSS JOIN unsettled AS u
+    WHERE e.id > :from_id AND (u.id IS NULL OR e.id < u.id)
+    ORDER BY e.id
+) AS b
+"""
+
+_stop = threading.Event()
+
+def run_rollup_once() -> int:
+    """Agrega um lote de eventos. Retorna quantos ids foram consumidos (0 = nada a fazer)."""
+    with policy_engine.begin() as conn:
+        row = conn.execute(
+            text("SELECT last_event_id FROM dbo.rate_limit_rollup_state WHERE name = :n"), {"n": STATE_NAME}
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                text("INSERT INTO dbo.rate_limit_rollup_state(name, last_event_id, updated_at) VALUES (:n, 0, SYSUTCDATETIME())"),
+                {"n": STATE_NAME},
+            )
+            from_id = 0
+        else:
+            from_id = int(row[0])
+
+        to_id = conn.execute(text(_TO_ID_SQL), {"batch": ROLLUP_BATCH_SIZE, "from_id": from_id, "settle": ROLLUP_SETTLE_SEC}).scalar()
+        if to_id is None:
+            return 0
+
+        # Avança a marca primeiro: se outro worker chegou antes, rowcount = 0 e nada é agregado
+        moved = conn.execute(
+            text("""
+                UPDATE dbo.rate_limit_rollup_state
+                SET last_event_id = :to_id, updated_at = SYSUTCDATETIME()
+                WHERE name = :n AND last_event_id = :from_id
+            """),
+            {"to_id": to_id, "from_id": from_id, "n": STATE_NAME},
+        ).rowcount
+        if moved != 1:
+            return 0
+
+        for granularity, bucket in _BUCKETS.items():
+            conn.execute(
+                text(_MERGE_SQL.format(bucket=bucket)),
+                {"from_id": from_id, "to_id": to_id, "granularity": granularity},
+            )
+    return int(to_id) - from_id
+
+def run_rollup() -> int:
+    """Consome todo o backlog pendente em lotes."""
+    total = 0
+    while True:
+        consumed = run_rollup_once()
+        if not consumed:
+            return total
+        total += consumed
+
+def _rollup_loop():
+    while not _stop.wait(ROLLUP_INTERVAL_SEC):
+        try:
+            run_rollup()
+        except Exception as e:
+            logger.error(f"Falha no rollup de rate_limit_event: {e}")
+
+def start_rollup_worker():
+    if not ROLLUP_ENABLED or ROLLUP_INTERVAL_SEC <= 0:
+        return
+    _stop.clear()
+    threading.Thread(target=_rollup_loop, name="rate-limit-rollup", daemon=True).start()
+
+def stop_rollup_worker():
+    _stop.set()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Rollup concluído: {run_rollup()} ids processados.")
@@ -0,0 +1,84 @@
+"""
+Benchmark de compressão: CPU x taxa por codec/nível em payloads realistas.
+
+Gera registros no formato das views de logística (campos CHAR do Protheus com
+padding, códigos de status repetidos, datas YYYYMMDD) e mede, para cada nível:
+tempo de compressão, throughput e razão original/comprimido.
+
+Uso:
+    python bench/compression_bench.py                # 20k linhas
+    python bench/compression_bench.py --rows 100000
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.compression import compress, available_encodings, iter_json_payload
+
+LEVELS = {
+    "gzip": [1, 3, 6, 9],
+    "br": [1, 3, 5, 7, 9, 11],
+    "zstd": [1, 3, 6, 9, 15, 19],
+}
+
+STATUS = ["LIBERADO", "BLOQUEADO", "FATURADO", "EM SEPARACAO", "CARREGADO"]
+FILIAIS = ["01", "02", "03", "04"]
+
+def pad(value: str, size: int) -> str:
+    return value.ljust(size)
+
+def make_payload(rows: int, seed: int = 42) -> dict:
+    rnd = random.Random(seed)
+    data = []
+    for i in range(rows):
+        data.append({
+            "FILIAL": rnd.choice(FILIAIS),
+            "PEDIDO": f"{rnd.randint(1, 999999):06d}",
+            "ITEM": f"{rnd.randint(1, 40):02d}",
+            "CLIENTE": pad(f"{rnd.randint(1, 5000):06d}", 8),
+            "LOJA": "01",
+            "NOME_CLIENTE": pad(f"CLIENTE {rnd.randint(1, 5000)} LTDA", 40),
+            "PRODUTO": pad(f"PA{rnd.randint(1, 800):05d}", 15),
+            "DESCRICAO": pad(f"PRODUTO ACABADO {rnd.randint(1, 800)}", 60),
+            "QUANTIDADE": round(rnd.uniform(1, 500), 2),
+            "VALOR": round(rnd.uniform(10, 50000), 2),
+            "EMISSAO": f"2025{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}",
+            "STATUS": rnd.choice(STATUS),
+            "TRANSPORTADORA": pad(f"{rnd.randint(1, 30):06d}", 6),
+            "OBS": pad("", 80),
+            "R_E_C_N_O_": i + 1,
+        })
+    return {"success": True, "table": "CARTEIRA_LOGISTICA", "data": data, "count": rows}
+
+def bench(body: bytes, encoding: str, level: int, repeat: int) -> tuple:
+    best = float("inf")
+    out = b""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = compress(body, encoding, level)
+        best = min(best, time.perf_counter() - t0)
+    return best, len(out)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    body = b"".join(iter_json_payload(make_payload(args.rows)))
+    size_mb = len(body) / 1024 / 1024
+    print(f"Payload: {args.rows} linhas, {size_mb:.2f} MB JSON")
+    print(f"{'codec':<6} {'nível':>5} {'tempo (ms)':>11} {'MB/s':>8} {'tamanho (KB)':>13} {'razão':>7}")
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            elapsed, size = bench(body, encoding, level, args.repeat)
+            print(f"{encoding:<6} {level:>5} {elapsed * 1000:>11.1f} {size_mb / elapsed:>8.1f} {size / 1024:>13.1f} {len(body) / size:>7.1f}")
+
+if __name__ == "__main__":
+    main()
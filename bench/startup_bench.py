@@ -0,0 +1,116 @@
+"""
+Benchmark de startup: tempo de import de api.main e tempo até a primeira resposta.
+
+Mede em processos novos (como um worker reiniciado pelo supervisord):
+- import: mediana de N imports de api.main + módulos pesados carregados no import
+- ttfr: spawn do uvicorn até o primeiro 200 em GET /
+
+Sai com código 1 se algum orçamento for estourado (uso em CI/deploy):
+    python bench/startup_bench.py
+    python bench/startup_bench.py --import-budget-ms 700 --ttfr-budget-ms 2000
+Requer o .env da raiz (DATABASE_URL/POLICY_DATABASE_URL). Os processos medidos rodam
+com STARTUP_WARMUP=off e os jobs de background desligados (BENCH_ENV), para que o
+orçamento não dependa de o banco estar acessível. Como o .env é carregado com
+override, essas variáveis não podem estar definidas nele.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Startup sem banco: nada de schema, warm-up, validação de pool, rollup ou retenção
+BENCH_ENV = {
+    "STARTUP_WARMUP": "off",
+    "INIT_POLICY_ON_STARTUP": "false",
+    "DB_POOL_VALIDATE_INTERVAL_SEC": "0",
+    "ROLLUP_ENABLED": "false",
+    "RETENTION_ENABLED": "false",
+}
+
+def _bench_env() -> dict:
+    return {**os.environ, **BENCH_ENV}
+
+_IMPORT_SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+import api.main
+elapsed = (time.perf_counter() - t) * 1000
+print(json.dumps({"ms": elapsed, "modules": sorted(m for m in sys.modules if "." not in m)}))
+"""
+
+def measure_import(runs: int) -> tuple:
+    timings, modules = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET], cwd=ROOT, env=_bench_env(), capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        modules = set(result["modules"])
+    return statistics.median(timings), modules
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_ttfr(timeout_sec: float) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout_sec:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn terminou com código {proc.returncode}")
+        raise TimeoutError(f"sem resposta em {timeout_sec}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "800")))
+    parser.add_argument("--ttfr-budget-ms", type=float, default=float(os.getenv("STARTUP_TTFR_BUDGET_MS", "2500")))
+    parser.add_argument("--forbid", default="pandas,numpy,pyarrow,redis",
+                        help="módulos que não podem ser carregados no import de api.main")
+    args = parser.parse_args()
+
+    failures = []
+    import_ms, modules = measure_import(args.runs)
+    print(f"import api.main   : {import_ms:8.1f} ms (mediana de {args.runs}, orçamento {args.import_budget_ms:.0f} ms)")
+    if import_ms > args.import_budget_ms:
+        failures.append("import")
+    loaded = sorted(m for m in args.forbid.split(",") if m and m in modules)
+    print(f"módulos proibidos : {', '.join(loaded) or 'nenhum'}")
+    if loaded:
+        failures.append("forbidden modules")
+
+    ttfr = [measure_ttfr(timeout_sec=60) for _ in range(args.runs)]
+    ttfr_ms = statistics.median(ttfr)
+    print(f"primeira resposta : {ttfr_ms:8.1f} ms (mediana de {args.runs}, orçamento {args.ttfr_budget_ms:.0f} ms)")
+    if ttfr_ms > args.ttfr_budget_ms:
+        failures.append("ttfr")
+
+    if failures:
+        print(f"FALHOU: {', '.join(failures)}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
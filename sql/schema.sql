@@ -68,8 +68,40 @@ BEGIN
     calls INT NULL,
     reason NVARCHAR(200) NULL
   );
-  CREATE INDEX IX_rate_limit_event_q
-  ON dbo.rate_limit_event(ts, username, endpoint, decision);
+  CREATE INDEX IX_rate_limit_event_ts
+  ON dbo.rate_limit_event(ts);
+END;
+
+-- Migração: índice largo (ts, username, endpoint, decision) encarecia cada insert.
+-- Relatórios agora leem rate_limit_event_rollup; na tabela quente basta ts (retenção/filtro detalhado).
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_rate_limit_event_q' AND object_id = OBJECT_ID('dbo.rate_limit_event'))
+  DROP INDEX IX_rate_limit_event_q ON dbo.rate_limit_event;
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_rate_limit_event_ts' AND object_id = OBJECT_ID('dbo.rate_limit_event'))
+  CREATE INDEX IX_rate_limit_event_ts ON dbo.rate_limit_event(ts);
+
+IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'rate_limit_event_rollup')
+BEGIN
+  CREATE TABLE dbo.rate_limit_event_rollup (
+    id BIGINT IDENTITY PRIMARY KEY,
+    granularity NVARCHAR(10) NOT NULL, -- 'minute' | 'hour' | 'day'
+    bucket_ts DATETIME2 NOT NULL,
+    username NVARCHAR(100) NOT NULL,
+    role NVARCHAR(50) NOT NULL,
+    endpoint NVARCHAR(200) NOT NULL,
+    decision NVARCHAR(20) NOT NULL,
+    events BIGINT NOT NULL DEFAULT 0
+  );
+  CREATE UNIQUE INDEX UX_rate_limit_event_rollup_key
+  ON dbo.rate_limit_event_rollup(granularity, bucket_ts, username, role, endpoint, decision);
+END;
+
+IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'rate_limit_rollup_state')
+BEGIN
+  CREATE TABLE dbo.rate_limit_rollup_state (
+    name NVARCHAR(50) NOT NULL PRIMARY KEY, -- 'rate_limit_event'
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+  );
 END;
 
 -- Usuário admin de exemplo (senha: Admin@123) - troque em produção!
@@ -0,0 +1,60 @@
+import os
+import sys
+import fnmatch
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Os testes não usam o .env da raiz (Protheus/BISOBEL via ODBC): bancos SQLite locais
+import dotenv
+dotenv.load_dotenv = lambda *args, **kwargs: None
+os.environ["DATABASE_URL"] = "sqlite:///" + str(ROOT / ".pytest_cache" / "data.db")
+os.environ["POLICY_DATABASE_URL"] = "sqlite:///" + str(ROOT / ".pytest_cache" / "policy.db")
+(ROOT / ".pytest_cache").mkdir(exist_ok=True)
+
+
+class MemoryRedis:
+    """Subconjunto do cliente Redis usado por api.cache/api.etag (bytes, sem TTL real)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def setex(self, key, ttl, value):
+        self.set(key, value)
+
+    def keys(self, pattern="*"):
+        return [k for k in self.data if fnmatch.fnmatch(k, pattern)]
+
+
+@pytest.fixture
+def redis_memory(monkeypatch):
+    from api import cache
+    client = MemoryRedis()
+    monkeypatch.setattr(cache, "_cache_client", client)
+    return client
+
+
+@pytest.fixture
+def client(monkeypatch, redis_memory):
+    from fastapi.testclient import TestClient
+    import api.main as main
+
+    monkeypatch.setattr(main, "check_rate_limit", lambda **kwargs: None)
+    monkeypatch.setattr(main, "table_signal", lambda engine, table: "1|1")
+    test_client = TestClient(main.app)
+    token = test_client.post("/login", json={"username": "admin", "password": "Ade@ade@4522"}).json()["access_token"]
+    test_client.headers.update({"Authorization": f"Bearer {token}"})
+    return test_client
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import api.main as main
+from api.aggregate import build_aggregate_query, parse_group_by, parse_measures, AGGREGATE_MAX_GROUPS
+
+COLUMNS = {"FILIAL": "char", "EMISSAO": "date", "VALOR": "decimal", "STATUS": "varchar", "OBS": "text"}
+
+
+def test_build_aggregate_query_uses_whitelisted_identifiers_and_bind_params():
+    sql, params = build_aggregate_query("FATURAMENTO_LOGISTICA", COLUMNS, ["FILIAL"],
+                                        parse_measures("count:*,sum:VALOR,max:EMISSAO"), "LIBERADO")
+
+    assert sql == ("SELECT TOP (:max_groups) [FILIAL], COUNT_BIG(*) AS [count], SUM([VALOR]) AS [sum_VALOR], "
+                   "MAX([EMISSAO]) AS [max_EMISSAO] FROM FATURAMENTO_LOGISTICA WHERE STATUS = :status_filter "
+                   "GROUP BY [FILIAL] ORDER BY [FILIAL]")
+    assert params == {"max_groups": AGGREGATE_MAX_GROUPS + 1, "status_filter": "LIBERADO"}
+
+
+@pytest.mark.parametrize("group_by, measures, message", [
+    ("FILIAL];DROP TABLE X--", "count:*", "Dimensão não permitida"),
+    ("OBS", "count:*", "Dimensão não permitida"),
+    ("FILIAL,FILIAL", "count:*", "Dimensão repetida"),
+    ("FILIAL", "sum:NAO_EXISTE", "Medida não permitida"),
+    ("FILIAL", "max:OBS", "Medida não permitida"),
+    ("FILIAL", "sum:STATUS", "sum exige coluna numérica"),
+    ("FILIAL", "sum:*", "sum exige uma coluna"),
+    ("FILIAL", "avg:VALOR", "Agregação não permitida"),
+    ("FILIAL", "sum:VALOR,sum:valor", "Medida repetida"),
+    ("", "count:FILIAL,count:FILIAL", "Medida repetida"),
+    ("A,B,C,D,E", "count:*", "Máximo de"),
+])
+def test_build_aggregate_query_rejects_invalid_input(group_by, measures, message):
+    with pytest.raises(ValueError, match=message):
+        build_aggregate_query("FATURAMENTO_LOGISTICA", COLUMNS, parse_group_by(group_by), parse_measures(measures))
+
+
+class FakeResult:
+    def __init__(self, columns, rows):
+        self.columns, self.rows = columns, rows
+
+    def keys(self):
+        return self.columns
+
+    def fetchmany(self, size):
+        return self.rows[:size]
+
+
+class FakeEngine:
+    def __init__(self, result):
+        self.result = result
+        self.params = None
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execute(self, statement, params):
+        self.params = params
+        return self.result
+
+
+def _run_aggregate(monkeypatch, rows, group_by, measures):
+    engine = FakeEngine(FakeResult([*group_by, *(f"{f}_{c}" for f, c in measures)], rows))
+    monkeypatch.setattr(main, "get_db_connection_engine", lambda: engine)
+    monkeypatch.setattr(main, "table_columns", lambda engine, view: COLUMNS)
+    return main.execute_aggregate_query("FATURAMENTO_LOGISTICA", group_by, measures), engine
+
+
+def test_aggregate_by_date_column_is_serialized(client, redis_memory, monkeypatch):
+    rows = [(date(2025, 1, 2), Decimal("10.50"), date(2025, 1, 2))]
+    engine = FakeEngine(FakeResult(["EMISSAO", "sum_VALOR", "max_EMISSAO"], rows))
+    monkeypatch.setattr(main, "get_db_connection_engine", lambda: engine)
+    monkeypatch.setattr(main, "table_columns", lambda engine, view: COLUMNS)
+
+    response = client.get("/aggregate/faturamento-logistica?group_by=EMISSAO&measures=sum:VALOR,max:EMISSAO")
+
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"EMISSAO": "2025-01-02", "sum_VALOR": 10.5, "max_EMISSAO": "2025-01-02"}]
+    assert response.json()["truncated"] is False
+
+
+def test_aggregate_flags_truncated_groups(monkeypatch):
+    monkeypatch.setattr(main, "AGGREGATE_MAX_GROUPS", 2)
+    rows = [("01", 1), ("02", 2), ("03", 3)]
+
+    payload, _ = _run_aggregate(monkeypatch, rows, ["FILIAL"], [("sum", "VALOR")])
+
+    assert payload["truncated"] is True
+    assert payload["count"] == 2
+    assert [r["FILIAL"] for r in payload["data"]] == ["01", "02"]
+
+
+def test_aggregate_within_limit_is_not_truncated(monkeypatch):
+    payload, engine = _run_aggregate(monkeypatch, [("01", 1)], ["FILIAL"], [("sum", "VALOR")])
+
+    assert payload["truncated"] is False
+    assert engine.params["max_groups"] == AGGREGATE_MAX_GROUPS + 1
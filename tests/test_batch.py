@@ -0,0 +1,31 @@
+import threading
+
+import api.main as main
+
+
+def test_batch_limit_never_exceeds_workers():
+    assert main.BATCH_MAX_REQUESTS <= main.BATCH_MAX_WORKERS
+    capacity = main.POOL_CONFIG["data_engine"]["pool_size"] + main.POOL_CONFIG["data_engine"]["max_overflow"]
+    assert main.BATCH_MAX_WORKERS <= capacity
+
+
+def test_full_batch_runs_in_a_single_wave(client, monkeypatch):
+    # Cada consulta só termina quando todas as BATCH_MAX_REQUESTS estiverem em voo juntas
+    barrier = threading.Barrier(main.BATCH_MAX_REQUESTS)
+    in_flight = []
+
+    def blocking_query(table_name, limit, offset, status_filter):
+        in_flight.append(barrier.wait(timeout=10))
+        return {"success": True, "table": table_name, "data": [], "count": 0, "offset": offset}
+
+    monkeypatch.setattr(main, "execute_table_query", blocking_query)
+    # offsets diferentes: chaves de cache distintas, todas as consultas executam
+    body = {"requests": [{"table": "docas-logistica", "offset": i} for i in range(main.BATCH_MAX_REQUESTS)]}
+
+    result = client.post("/batch", json=body).json()
+
+    assert result["success"] is True
+    assert result["count"] == main.BATCH_MAX_REQUESTS
+    assert all(r["cache"] == "MISS" for r in result["results"])
+    assert sorted(in_flight) == list(range(main.BATCH_MAX_REQUESTS))
+    assert not barrier.broken
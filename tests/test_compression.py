@@ -0,0 +1,87 @@
+import gzip
+import json
+import zlib
+
+import brotli
+import pytest
+import zstandard
+
+from api import compression
+from api.compression import negotiate_encoding, compress, compress_stream, iter_json_payload, StreamingCompressor
+
+DECOMPRESS = {
+    None: lambda data: data,
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("zstd;q=0, br;q=0, gzip", "gzip"),
+    ("*", "zstd"),
+    ("*;q=0.1, gzip;q=0.1", "zstd"),
+    ("*, zstd;q=0", "br"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("GZIP ; Q=1", "gzip"),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_encoding_respects_compression_switch(monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESSION_ENABLED", False)
+    assert negotiate_encoding("gzip, br, zstd") is None
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "br", "zstd"])
+def test_one_shot_round_trip(encoding):
+    data = b'{"data":[' + b",".join(b'{"N":%d}' % i for i in range(1000)) + b"]}"
+    assert DECOMPRESS[encoding](compress(data, encoding)) == data
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "br", "zstd"])
+@pytest.mark.parametrize("flush", [False, True])
+def test_stream_round_trip_matches_sink(encoding, flush):
+    payload = {"success": True, "data": [{"N": i, "STATUS": "LIBERADO"} for i in range(1200)], "count": 1200}
+    sink = []
+
+    chunks = list(compress_stream(iter_json_payload(payload, chunk_rows=500), encoding, sink, flush=flush))
+
+    body = b"".join(chunks)
+    assert body == b"".join(sink)
+    assert json.loads(DECOMPRESS[encoding](body)) == payload
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_flush_makes_each_line_decodable(encoding):
+    comp = StreamingCompressor(encoding)
+    if encoding == "gzip":
+        decode = zlib.decompressobj(31).decompress
+    elif encoding == "br":
+        decode = brotli.Decompressor().process
+    else:
+        decode = zstandard.ZstdDecompressor().decompressobj().decompress
+
+    for line in (b'{"index":0}\n', b'{"index":1}\n'):
+        assert decode(comp.write(line) + comp.flush()) == line
+    decode(comp.finish())
+
+
+def test_iter_json_payload_without_data():
+    assert b"".join(iter_json_payload({"success": False, "error": "x"})) == b'{"success":false,"error":"x"}'
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        StreamingCompressor("deflate")
+    with pytest.raises(ValueError):
+        compress(b"x", "deflate")
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from api import db
+
+
+def test_pool_stats_report_configured_limits():
+    stats = db.pool_stats()
+
+    for name, config in db.POOL_CONFIG.items():
+        assert stats[name]["size"] == config["pool_size"]
+        assert stats[name]["max_overflow"] == config["max_overflow"]
+        assert stats[name]["exhausted"] is False
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=3, max_overflow=2)
+    yield engine
+    engine.dispose()
+
+
+def test_warm_pool_leaves_connections_checked_in(engine):
+    assert db.warm_pool(engine, 3) == 3
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+
+
+def test_validate_pool_invalidates_broken_connection(engine, monkeypatch):
+    counters = {"validations": 0, "invalidated": 0, "last_validation": None, "warmed": 0}
+    monkeypatch.setitem(db._POOL_COUNTERS, "test", counters)
+    db.warm_pool(engine, 3)
+    with engine.connect() as conn:
+        raw = conn.connection.dbapi_connection
+    # Conexão ociosa quebrada por baixo do pool (ex.: servidor derrubou a sessão)
+    raw.close()
+
+    db.validate_pool(engine, "test")
+
+    assert counters["invalidated"] == 1
+    assert counters["validations"] == 1
+    assert engine.pool.checkedout() == 0
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT 1").scalar() == 1
+
+
+def test_validate_pool_holds_one_connection_at_a_time(engine, monkeypatch):
+    monkeypatch.setitem(db._POOL_COUNTERS, "test", {"validations": 0, "invalidated": 0, "last_validation": None, "warmed": 0})
+    db.warm_pool(engine, 3)
+    checked_out = []
+
+    @event.listens_for(engine, "engine_connect")
+    def record(conn):
+        checked_out.append(engine.pool.checkedout())
+
+    db.validate_pool(engine, "test")
+
+    assert checked_out == [1, 1, 1]
+    assert engine.pool.overflow() <= 0
@@ -0,0 +1,34 @@
+from api import etag
+
+
+class FailingEngine:
+    def __init__(self):
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        raise RuntimeError("Invalid column name 'R_E_C_N_O_'")
+
+
+def test_default_probe_avoids_checksum_scan():
+    sql = etag._probe_sql("CARTEIRA_LOGISTICA")
+    assert "MAX(R_E_C_N_O_)" in sql
+    assert "CHECKSUM" not in sql
+
+
+def test_checksum_probe_is_opt_in_per_table(monkeypatch):
+    monkeypatch.setenv("ETAG_PROBE_DOCAS_LOGISTICA", "checksum")
+    assert "CHECKSUM_AGG" in etag._probe_sql("DOCAS_LOGISTICA")
+    assert "CHECKSUM_AGG" not in etag._probe_sql("CARTEIRA_LOGISTICA")
+
+
+def test_failed_probe_is_not_retried_on_every_request(redis_memory):
+    engine = FailingEngine()
+    assert etag.table_signal(engine, "DOCAS_LOGISTICA") is None
+    assert etag.table_signal(engine, "DOCAS_LOGISTICA") is None
+    assert engine.connects == 1
+
+
+def test_etag_matches_weak_comparison():
+    assert etag.etag_matches('"abc", W/"def"', 'W/"def"')
+    assert not etag.etag_matches('W/"abc"', 'W/"def"')
@@ -0,0 +1,106 @@
+import uuid
+from datetime import date, time
+from decimal import Decimal
+
+import api.main as main
+
+
+def _small_query(calls):
+    def run(table_name, limit, offset, status_filter):
+        calls.append(table_name)
+        return {"success": True, "table": table_name, "data": [{"STATUS": "LIBERADO"}], "count": 1}
+    return run
+
+
+def test_small_payload_is_cache_hit_with_accept_encoding(client, redis_memory, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "execute_table_query", _small_query(calls))
+    headers = {"Accept-Encoding": "gzip"}
+
+    first = client.get("/docas-logistica", headers=headers)
+    second = client.get("/docas-logistica", headers=headers)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert "content-encoding" not in second.headers
+    assert second.json()["data"] == [{"STATUS": "LIBERADO"}]
+    assert calls == ["DOCAS_LOGISTICA"]
+
+
+def test_identity_entry_is_compressed_for_encoding_clients(client, redis_memory, monkeypatch):
+    calls = []
+
+    def big_query(table_name, limit, offset, status_filter):
+        calls.append(table_name)
+        rows = [{"STATUS": "LIBERADO  ", "N": i} for i in range(200)]
+        return {"success": True, "table": table_name, "data": rows, "count": len(rows)}
+
+    monkeypatch.setattr(main, "execute_table_query", big_query)
+
+    client.get("/docas-logistica", headers={"Accept-Encoding": "identity"})
+    hit = client.get("/docas-logistica", headers={"Accept-Encoding": "gzip"})
+
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.headers["content-encoding"] == "gzip"
+    assert hit.json()["count"] == 200
+    assert calls == ["DOCAS_LOGISTICA"]
+
+
+def test_aggregate_second_call_is_cache_hit(client, redis_memory, monkeypatch):
+    calls = []
+
+    def aggregate(table_name, group_by, measures, status_filter):
+        calls.append((table_name, tuple(group_by)))
+        return {"success": True, "table": table_name, "data": [{"FILIAL": "01", "count": 3}], "count": 1}
+
+    monkeypatch.setattr(main, "table_columns", lambda engine, view: {"FILIAL": "char", "VALOR": "decimal"})
+    monkeypatch.setattr(main, "execute_aggregate_query", aggregate)
+    headers = {"Accept-Encoding": "gzip, deflate, br"}
+    url = "/aggregate/faturamento-logistica?group_by=FILIAL&measures=count:*,sum:VALOR"
+
+    first = client.get(url, headers=headers)
+    second = client.get(url, headers=headers)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json()["data"] == [{"FILIAL": "01", "count": 3}]
+    assert calls == [("FATURAMENTO_LOGISTICA", ("FILIAL",))]
+
+
+def test_batch_items_share_the_response_cache(client, redis_memory, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "execute_table_query", _small_query(calls))
+
+    client.get("/docas-logistica", headers={"Accept-Encoding": "gzip"})
+    body = {"requests": [{"table": "docas-logistica"}, {"table": "carregamento-logistica"}, {"table": "nope"}]}
+    first = client.post("/batch", json=body).json()
+    second = client.post("/batch", json=body).json()
+
+    assert [r["cache"] for r in first["results"][:2]] == ["HIT", "MISS"]
+    assert [r["cache"] for r in second["results"][:2]] == ["HIT", "HIT"]
+    assert second["results"][0] == {"index": 0, "cache": "HIT", "success": True, "table": "DOCAS_LOGISTICA",
+                                    "data": [{"STATUS": "LIBERADO"}], "count": 1}
+    assert second["results"][2]["status_code"] == 404
+    assert second["success"] is False
+    assert calls == ["DOCAS_LOGISTICA", "CARREGAMENTO_LOGISTICA"]
+
+
+def test_date_time_and_uuid_values_are_serialized(client, redis_memory, monkeypatch):
+    uid = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    assert main.safe_convert_value(date(2025, 1, 2)) == "2025-01-02"
+    assert main.safe_convert_value(time(8, 30)) == "08:30:00"
+    assert main.safe_convert_value(uid) == str(uid)
+
+    def dated_query(table_name, limit, offset, status_filter):
+        row = {"EMISSAO": date(2025, 1, 2), "HORA": time(8, 30), "ID": uid, "VALOR": Decimal("1.50")}
+        return {"success": True, "table": table_name, "data": [row], "count": 1}
+
+    monkeypatch.setattr(main, "execute_table_query", dated_query)
+
+    response = client.get("/docas-logistica")
+    batch = client.post("/batch", json={"requests": [{"table": "carregamento-logistica"}]}).json()
+
+    expected = [{"EMISSAO": "2025-01-02", "HORA": "08:30:00", "ID": str(uid), "VALOR": 1.5}]
+    assert response.status_code == 200
+    assert response.json()["data"] == expected
+    assert batch["results"][0]["data"] == expected
@@ -0,0 +1,105 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from api import retention
+
+
+class FakeResult:
+    def __init__(self, rowcount=0, row=None):
+        self.rowcount = rowcount
+        self._row = row
+
+    def fetchone(self):
+        return self._row
+
+
+class FakeEngine:
+    """Devolve os rowcounts/linhas programados, um por execute()."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = 0
+
+    @contextmanager
+    def _conn(self):
+        yield self
+
+    def begin(self):
+        return self._conn()
+
+    def connect(self):
+        return self._conn()
+
+    def execute(self, *args, **kwargs):
+        self.executed += 1
+        return self.results.pop(0)
+
+
+def test_archived_range_is_fully_deleted_even_when_stopping(monkeypatch):
+    engine = FakeEngine([FakeResult(rowcount=n) for n in (4000, 4000, 12)])
+    monkeypatch.setattr(retention, "policy_engine", engine)
+    monkeypatch.setattr(retention, "RETENTION_DELETE_BATCH", 4000)
+    monkeypatch.setattr(retention, "RETENTION_DELETE_PAUSE_MS", 0)
+    retention._stop.set()
+    try:
+        assert retention._delete_in_batches("DELETE", {}) == 0
+        assert retention._delete_in_batches("DELETE", {}, interruptible=False) == 8012
+    finally:
+        retention._stop.clear()
+    assert engine.executed == 3
+
+
+def test_missing_rollup_watermark_is_reported(monkeypatch, caplog):
+    engine = FakeEngine([FakeResult(row=None)])
+    monkeypatch.setattr(retention, "policy_engine", engine)
+    monkeypatch.setattr(retention, "ROLLUP_ENABLED", True)
+
+    with caplog.at_level(logging.WARNING, logger="api.retention"):
+        assert retention.purge_events_once(datetime(2025, 1, 1)) == 0
+
+    assert "rate_limit_rollup_state" in caplog.text
+    assert engine.executed == 1
+
+
+def _events(rows):
+    import pandas as pd
+    return pd.DataFrame([{"id": i, "ts": ts, "username": "u"} for i, ts in rows])
+
+
+def _archived(tmp_path):
+    import pyarrow.parquet as pq
+    return {
+        str(path.relative_to(tmp_path)): pq.read_table(path, columns=["id"]).column("id").to_pylist()
+        for path in sorted(tmp_path.rglob("*.parquet"))
+    }
+
+
+def test_archive_chunk_is_split_by_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_ARCHIVE_DIR", tmp_path)
+    df = _events([(1, datetime(2025, 1, 1, 23, 59)), (2, datetime(2025, 1, 2, 0, 1)),
+                  (3, datetime(2025, 1, 1, 23, 59, 59)), (4, datetime(2025, 1, 3, 8))])
+
+    retention._archive_chunk(df)
+
+    assert _archived(tmp_path) == {
+        "rate_limit_event/2025-01-01/events_1_3.parquet": [1, 3],
+        "rate_limit_event/2025-01-02/events_2_2.parquet": [2],
+        "rate_limit_event/2025-01-03/events_4_4.parquet": [4],
+    }
+
+
+def test_resumed_chunk_does_not_duplicate_archived_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_ARCHIVE_DIR", tmp_path)
+    day = datetime(2025, 1, 1, 10)
+    retention._archive_chunk(_events([(i, day) for i in range(1, 11)]))
+
+    # Queda depois do Parquet: 1..4 apagados, 5..10 ainda na tabela, 11..12 novos
+    retention._archive_chunk(_events([(i, day) for i in range(5, 13)]))
+
+    archived = _archived(tmp_path)
+    assert archived == {
+        "rate_limit_event/2025-01-01/events_11_12.parquet": [11, 12],
+        "rate_limit_event/2025-01-01/events_1_10.parquet": list(range(1, 11)),
+    }
+    assert not list(tmp_path.rglob("*.tmp"))
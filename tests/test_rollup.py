@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+
+from api import rollup
+
+
+class FakeResult:
+    def __init__(self, row=None, scalar=None, rowcount=0):
+        self._row, self._scalar, self.rowcount = row, scalar, rowcount
+
+    def fetchone(self):
+        return self._row
+
+    def scalar(self):
+        return self._scalar
+
+
+class FakeEngine:
+    """Devolve os resultados programados, um por execute(), e guarda SQL + parâmetros."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        self.calls.append((str(statement), params))
+        return self.results.pop(0) if self.results else FakeResult()
+
+
+def test_batch_stops_before_first_unsettled_event(monkeypatch):
+    engine = FakeEngine([FakeResult(row=(100,)), FakeResult(scalar=150), FakeResult(rowcount=1)])
+    monkeypatch.setattr(rollup, "policy_engine", engine)
+
+    assert rollup.run_rollup_once() == 50
+
+    to_id_sql, to_id_params = engine.calls[1]
+    assert "ts >= DATEADD(second, -:settle, SYSUTCDATETIME())" in to_id_sql
+    assert "e.id < u.id" in to_id_sql
+    assert to_id_params["from_id"] == 100
+    merges = [params for sql, params in engine.calls if "MERGE" in sql]
+    assert [m["granularity"] for m in merges] == ["minute", "hour", "day"]
+    assert all(m["from_id"] == 100 and m["to_id"] == 150 for m in merges)
+
+
+def test_nothing_settled_keeps_watermark(monkeypatch):
+    engine = FakeEngine([FakeResult(row=(100,)), FakeResult(scalar=None)])
+    monkeypatch.setattr(rollup, "policy_engine", engine)
+
+    assert rollup.run_rollup_once() == 0
+    assert len(engine.calls) == 2
+
+
+def test_lost_watermark_race_aggregates_nothing(monkeypatch):
+    engine = FakeEngine([FakeResult(row=(100,)), FakeResult(scalar=150), FakeResult(rowcount=0)])
+    monkeypatch.setattr(rollup, "policy_engine", engine)
+
+    assert rollup.run_rollup_once() == 0
+    assert not any("MERGE" in sql for sql, _ in engine.calls)
+
+
+def test_first_run_creates_watermark_row(monkeypatch):
+    engine = FakeEngine([FakeResult(row=None), FakeResult(), FakeResult(scalar=7), FakeResult(rowcount=1)])
+    monkeypatch.setattr(rollup, "policy_engine", engine)
+
+    assert rollup.run_rollup_once() == 7
+    assert "INSERT INTO dbo.rate_limit_rollup_state" in engine.calls[1][0]
+    assert engine.calls[3][1] == {"to_id": 7, "from_id": 0, "n": rollup.STATE_NAME}